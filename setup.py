@@ -63,7 +63,7 @@ setup(
         ],
     },
     
-    python_requires='>=3.8',
+    python_requires='>=3.9',
     
     classifiers=[
         'Development Status :: 4 - Beta',
@@ -72,7 +72,6 @@ setup(
         'Topic :: Security',
         'Topic :: System :: Software Distribution',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',
         'Programming Language :: Python :: 3.10',
         'Programming Language :: Python :: 3.11',
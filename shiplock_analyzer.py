@@ -3,31 +3,120 @@ ShipLock Project Analyzer
 Scans and validates Docker-based projects for secure bundling
 """
 
+import hashlib
+import json
 import os
-import yaml
 import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 import fnmatch
 
 
+def _load_yaml(text: str):
+    """Parse YAML text, preferring libyaml's C loader when available
+
+    PyYAML is imported lazily so that CLI invocations that never touch a
+    YAML file (--help, license commands) skip its import cost.
+    """
+    import yaml
+
+    try:
+        loader = yaml.CSafeLoader
+    except AttributeError:
+        loader = yaml.SafeLoader
+    return yaml.load(text, Loader=loader)
+
+
+# Precompiled Dockerfile patterns (hoisted out of the analysis methods)
+_FROM_RE = re.compile(r'^FROM\s+', re.MULTILINE)
+_EXPOSE_RE = re.compile(r'EXPOSE\s+(\d+)')
+_APT_RE = re.compile(r'apt-get install.*?([a-z0-9\-]+)')
+
+# Pattern shapes that get cheap non-regex fast paths
+_SUFFIX_PATTERN_RE = re.compile(r'^\*\.\w+$')
+
+# Potential secret markers in .env files
+_SECRET_RE = re.compile(r'PASSWORD|SECRET|KEY|TOKEN|API_KEY', re.IGNORECASE)
+
+# Source-code extensions tracked by the scan (frozenset for O(1) membership)
+_SOURCE_EXTS = frozenset({'.py', '.js', '.ts', '.go', '.java', '.cpp', '.c'})
+
+
 class ProjectAnalyzer:
     """Analyzes Docker projects for bundling"""
     
     def __init__(self, project_path: str):
         self.project_path = Path(project_path).resolve()
+        self._project_prefix_len = len(str(self.project_path)) + 1
         self.config = self._load_config()
         self.ignore_patterns = self._load_ignore_patterns()
-        
+        self._compile_exclude_patterns()
+
+        # Memoized analysis results; instances are short-lived per CLI
+        # invocation so no invalidation is needed
+        self._scan_cache = None
+        self._docker_cache = None
+        self._deps_cache = None
+
+    def _compile_exclude_patterns(self):
+        """Classify ignore patterns into fast-path tuples and a fallback regex
+
+        Suffix globs (*.py) become a str.endswith tuple and directory
+        patterns (src/) a str.startswith tuple - both far cheaper than a
+        regex match. Only patterns that need real globbing fall through
+        to the compiled union regexes.
+        """
+        suffixes = []
+        prefixes = []
+        complex_patterns = []
+
+        for pattern in self.ignore_patterns:
+            if _SUFFIX_PATTERN_RE.match(pattern):
+                suffixes.append(pattern[1:])  # '*.py' -> '.py'
+            elif pattern.endswith('/') and not any(c in pattern for c in '*?['):
+                prefixes.append(pattern)
+            else:
+                complex_patterns.append(pattern)
+
+        self._suffix_tuple = tuple(suffixes)
+        self._prefix_tuple = tuple(prefixes)
+
+        path_patterns = [fnmatch.translate(p) for p in complex_patterns]
+        name_patterns = [fnmatch.translate(p) for p in complex_patterns if '/' not in p]
+
+        self._exclude_re = re.compile('|'.join(f'(?:{p})' for p in path_patterns)) if path_patterns else None
+        self._exclude_basename_re = re.compile('|'.join(f'(?:{p})' for p in name_patterns)) if name_patterns else None
+
+        # Specialize the predicate for this exact pattern set: generate a
+        # function with the tuples inlined as constants and only the
+        # branches that can actually fire, then shadow the generic
+        # _should_exclude_str with it on the instance
+        lines = ['def _excl(path_str, name):']
+        if self._suffix_tuple:
+            lines.append(f'    if name.endswith({self._suffix_tuple!r}): return True')
+        if self._prefix_tuple:
+            lines.append(f'    if path_str.startswith({self._prefix_tuple!r}): return True')
+        if self._exclude_re is not None:
+            lines.append('    if _path_re.match(path_str): return True')
+        if self._exclude_basename_re is not None:
+            lines.append('    if _name_re.match(name): return True')
+        lines.append('    return False')
+
+        namespace = {'_path_re': self._exclude_re, '_name_re': self._exclude_basename_re}
+        exec(compile('\n'.join(lines), '<shiplock-exclude>', 'exec'), namespace)
+        self._should_exclude_str = namespace['_excl']
+
     def _load_config(self) -> Dict:
         """Load ShipLock configuration"""
         config_path = self.project_path / '.shiplock' / 'config.yaml'
         
         if not config_path.exists():
             return self._default_config()
-        
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
+
+        # libyaml prefers string input over file objects
+        return _load_yaml(config_path.read_text())
     
     def _default_config(self) -> Dict:
         """Default configuration"""
@@ -50,61 +139,304 @@ class ProjectAnalyzer:
             ]
         }
     
-    def _load_ignore_patterns(self) -> Set[str]:
-        """Load .bundleignore patterns"""
+    def _load_ignore_patterns(self) -> Tuple[str, ...]:
+        """Load .bundleignore patterns
+
+        Returns a tuple ordered by expected hit rate (directory prefixes,
+        then suffix globs, then catch-alls): tuple iteration is a linear
+        memory walk rather than a hash-table stride, and the stable order
+        keeps the most-hit checks first.
+        """
         ignore_file = self.project_path / '.bundleignore'
         patterns = set()
-        
+
         if ignore_file.exists():
-            with open(ignore_file, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#'):
-                        patterns.add(line)
-        
+            text = ignore_file.read_text(encoding='utf-8', errors='ignore')
+            patterns = {ln for ln in map(str.strip, text.splitlines()) if ln and ln[0] != '#'}
+
         # Add patterns from config
         patterns.update(self.config.get('exclude', []))
-        
-        return patterns
+
+        def rank(pattern: str) -> int:
+            if pattern.endswith('/') and not any(c in pattern for c in '*?['):
+                return 0
+            if _SUFFIX_PATTERN_RE.match(pattern):
+                return 1
+            return 2
+
+        return tuple(sorted(patterns, key=lambda p: (rank(p), p)))
     
+    @cached_property
+    def _dockerfile_text(self):
+        """Dockerfile contents, read once and shared across analyses"""
+        dockerfile_path = self.project_path / 'Dockerfile'
+        if not dockerfile_path.exists():
+            return None
+        with open(dockerfile_path, 'r') as f:
+            return f.read()
+
+    @cached_property
+    def _compose_data(self):
+        """Parsed docker-compose.yml, parsed once and shared across analyses"""
+        compose_path = self.project_path / 'docker-compose.yml'
+        if not compose_path.exists():
+            return None
+        return _load_yaml(compose_path.read_text())
+
+    def _is_pruned_dir(self, dir_path: str) -> bool:
+        """Whether a directory matches a directory-kill ignore pattern"""
+        if not self._prefix_tuple:
+            return False
+        rel = dir_path[self._project_prefix_len:] + '/'
+        return rel.startswith(self._prefix_tuple)
+
+    def _iter_subtree(self, dir_path: str):
+        """Yield (path, name) for every file under dir_path, no filtering"""
+        stack = [dir_path]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        yield entry.path, entry.name
+
     def _should_exclude(self, file_path: Path) -> bool:
         """Check if file should be excluded"""
-        relative_path = file_path.relative_to(self.project_path)
-        path_str = str(relative_path)
-        
-        for pattern in self.ignore_patterns:
-            if fnmatch.fnmatch(path_str, pattern):
-                return True
-            if fnmatch.fnmatch(file_path.name, pattern):
-                return True
-        
+        return self._should_exclude_str(str(file_path)[self._project_prefix_len:], file_path.name)
+
+    def _should_exclude_str(self, path_str: str, name: str) -> bool:
+        """String-only exclusion check for the traversal hot loop
+
+        path_str is the path relative to the project root; no Path
+        objects are materialized here. _compile_exclude_patterns shadows
+        this with a generated function specialized to the loaded pattern
+        set; this generic version documents the semantics.
+        """
+        if self._suffix_tuple and name.endswith(self._suffix_tuple):
+            return True
+        if self._prefix_tuple and path_str.startswith(self._prefix_tuple):
+            return True
+        if self._exclude_re is not None and self._exclude_re.match(path_str):
+            return True
+        if self._exclude_basename_re is not None and self._exclude_basename_re.match(name):
+            return True
+
         return False
     
+    def _iter_project_files(self, top: str):
+        """Yield (path, name, in_pruned_subtree) for every file under top
+
+        On POSIX this rides os.fwalk, which opens each directory once and
+        issues openat/fstatat relative to the dirfd instead of re-resolving
+        absolute paths. Elsewhere it falls back to an iterative DFS over
+        os.scandir, which still reuses the cached d_type per entry (PEP 471).
+        """
+        if hasattr(os, 'fwalk'):
+            for root, dirs, files, _rootfd in os.fwalk(top):
+                kept = []
+                for d in dirs:
+                    # Skip hidden directories
+                    if d.startswith('.'):
+                        continue
+                    full = os.path.join(root, d)
+                    # Prune ignored subtrees: every file inside is excluded
+                    # by definition, so sweep them without pattern matching
+                    if self._is_pruned_dir(full):
+                        for pruned_path, pruned_name in self._iter_subtree(full):
+                            yield pruned_path, pruned_name, True
+                    else:
+                        kept.append(d)
+                dirs[:] = kept
+
+                prefix = root + os.sep
+                for name in files:
+                    yield prefix + name, name, False
+            return
+
+        stack = [top]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                continue
+
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name.startswith('.'):
+                            continue
+                        if self._is_pruned_dir(entry.path):
+                            for pruned_path, pruned_name in self._iter_subtree(entry.path):
+                                yield pruned_path, pruned_name, True
+                            continue
+                        stack.append(entry.path)
+                    else:
+                        yield entry.path, entry.name, False
+
+    def _scan_subtree(self, top: str):
+        """Categorize every file under top; safe to run on a worker thread"""
+        included = []
+        excluded = []
+        source = []
+
+        for file_path, name, pruned in self._iter_project_files(top):
+            if pruned or self._should_exclude_str(file_path[self._project_prefix_len:], name):
+                excluded.append(file_path)
+
+                # Track source code files
+                dot = name.rfind('.')
+                if dot >= 0 and name[dot:] in _SOURCE_EXTS:
+                    source.append(file_path)
+            else:
+                included.append(file_path)
+
+        return included, excluded, source
+
+    def _dir_freshness(self) -> int:
+        """Max st_mtime_ns over every non-hidden directory in the project
+
+        Creating, deleting or renaming a file updates its parent
+        directory's mtime, so this one integer changes whenever the file
+        listing changes anywhere in the tree - not just directly under
+        the root. Computing it only needs readdir plus one stat per
+        directory, no per-file work, so validating a cached scan stays
+        much cheaper than re-categorizing every file.
+
+        Hidden directories are skipped to mirror the scan itself (their
+        files are never listed), which also keeps writes to the
+        .shiplock cache directory from invalidating the cache they
+        belong to.
+        """
+        newest = self.project_path.stat().st_mtime_ns
+        stack = [str(self.project_path)]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.'):
+                        try:
+                            mtime = entry.stat(follow_symlinks=False).st_mtime_ns
+                        except OSError:
+                            continue
+                        if mtime > newest:
+                            newest = mtime
+                        stack.append(entry.path)
+        return newest
+
+    def _scan_cache_key(self) -> list:
+        """Key a persisted scan against directory mtimes, ignore patterns
+        and the loaded config
+
+        The config digest matters because the cached result embeds
+        project name/version, and config.yaml lives under the hidden
+        .shiplock directory that the freshness walk deliberately skips.
+        """
+        ignore_digest = hashlib.sha256(
+            '\n'.join(sorted(self.ignore_patterns)).encode()
+        ).hexdigest()
+        config_digest = hashlib.sha256(
+            json.dumps(self.config, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return [self._dir_freshness(), ignore_digest, config_digest]
+
+    def _load_scan_cache(self) -> Optional[Dict]:
+        """Load a scan result persisted by a previous invocation, if fresh"""
+        cache_path = self.project_path / '.shiplock' / '.scan_cache.json'
+        try:
+            # JSON rather than pickle: the cache sits inside the scanned
+            # project, and unpickling a file someone else may have written
+            # would execute arbitrary code
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            key = payload['key']
+            result = payload['result']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+        if key != self._scan_cache_key():
+            return None
+        return result
+
+    def _write_scan_cache(self, result: Dict):
+        """Persist the scan result for subsequent CLI invocations"""
+        cache_path = self.project_path / '.shiplock' / '.scan_cache.json'
+        try:
+            cache_path.parent.mkdir(exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': self._scan_cache_key(), 'result': result}, f)
+        except OSError:
+            pass
+
     def scan_project(self) -> Dict:
-        """Scan project and categorize files"""
+        """Scan project and categorize files
+
+        included_list/excluded_list hold absolute path strings, not Path
+        objects - Path.__truediv__ per file is one of pathlib's most
+        expensive operations, so callers wrap entries only when needed.
+        """
+        if self._scan_cache is not None:
+            return self._scan_cache
+
+        cached = self._load_scan_cache()
+        if cached is not None:
+            self._scan_cache = cached
+            return cached
+
         included_files = []
         excluded_files = []
         source_files = []
-        
-        for root, dirs, files in os.walk(self.project_path):
-            # Skip hidden directories
-            dirs[:] = [d for d in dirs if not d.startswith('.')]
-            
-            root_path = Path(root)
-            
-            for file in files:
-                file_path = root_path / file
-                
-                if self._should_exclude(file_path):
-                    excluded_files.append(file_path)
-                    
-                    # Track source code files
-                    if file_path.suffix in ['.py', '.js', '.ts', '.go', '.java', '.cpp', '.c']:
-                        source_files.append(file_path)
-                else:
-                    included_files.append(file_path)
-        
-        return {
+
+        # Categorize top-level files inline and fan subdirectories out to
+        # worker threads - the walk blocks on getdents/readdir, so the GIL
+        # is released and the per-directory latency overlaps
+        top_dirs = []
+        try:
+            with os.scandir(str(self.project_path)) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name.startswith('.'):
+                            continue
+                        if self._is_pruned_dir(entry.path):
+                            for pruned_path, pruned_name in self._iter_subtree(entry.path):
+                                excluded_files.append(pruned_path)
+                                dot = pruned_name.rfind('.')
+                                if dot >= 0 and pruned_name[dot:] in _SOURCE_EXTS:
+                                    source_files.append(pruned_path)
+                            continue
+                        top_dirs.append(entry.path)
+                    else:
+                        if self._should_exclude_str(entry.path[self._project_prefix_len:], entry.name):
+                            excluded_files.append(entry.path)
+                            dot = entry.name.rfind('.')
+                            if dot >= 0 and entry.name[dot:] in _SOURCE_EXTS:
+                                source_files.append(entry.path)
+                        else:
+                            included_files.append(entry.path)
+        except OSError:
+            pass
+
+        if len(top_dirs) == 1:
+            results = [self._scan_subtree(top_dirs[0])]
+        elif top_dirs:
+            with ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) * 2)) as executor:
+                results = list(executor.map(self._scan_subtree, top_dirs))
+        else:
+            results = []
+
+        for included, excluded, source in results:
+            included_files.extend(included)
+            excluded_files.extend(excluded)
+            source_files.extend(source)
+
+        self._scan_cache = {
             'name': self.config['project']['name'],
             'version': self.config['project']['version'],
             'total_files': len(included_files) + len(excluded_files),
@@ -114,51 +446,84 @@ class ProjectAnalyzer:
             'included_list': included_files,
             'excluded_list': excluded_files
         }
+        self._write_scan_cache(self._scan_cache)
+        return self._scan_cache
     
+    def _scan_counts(self) -> Dict:
+        """Count included/excluded files without materializing file lists"""
+        if self._scan_cache is not None:
+            return {
+                'included': self._scan_cache['included_files'],
+                'excluded': self._scan_cache['excluded_files'],
+                'source_excluded': self._scan_cache['source_files_excluded']
+            }
+
+        included = 0
+        excluded = 0
+        source_excluded = 0
+
+        for file_path, name, pruned in self._iter_project_files(str(self.project_path)):
+            if pruned or self._should_exclude_str(file_path[self._project_prefix_len:], name):
+                excluded += 1
+
+                dot = name.rfind('.')
+                if dot >= 0 and name[dot:] in _SOURCE_EXTS:
+                    source_excluded += 1
+            else:
+                included += 1
+
+        return {
+            'included': included,
+            'excluded': excluded,
+            'source_excluded': source_excluded
+        }
+
     def detect_docker(self) -> Dict:
         """Detect Docker configuration"""
-        dockerfile_path = self.project_path / 'Dockerfile'
-        compose_path = self.project_path / 'docker-compose.yml'
-        
+        if self._docker_cache is not None:
+            return self._docker_cache
+
+        dockerfile_content = self._dockerfile_text
+        compose_data = self._compose_data
+
         docker_info = {
-            'has_dockerfile': dockerfile_path.exists(),
-            'has_compose': compose_path.exists(),
+            'has_dockerfile': dockerfile_content is not None,
+            'has_compose': compose_data is not None,
             'multi_stage': False,
             'services': 0,
             'exposed_ports': [],
             'volumes': []
         }
-        
+
         # Analyze Dockerfile
-        if dockerfile_path.exists():
-            with open(dockerfile_path, 'r') as f:
-                dockerfile_content = f.read()
-                
-                # Detect multi-stage build
-                from_count = len(re.findall(r'^FROM\s+', dockerfile_content, re.MULTILINE))
-                docker_info['multi_stage'] = from_count > 1
-                
-                # Extract exposed ports
-                ports = re.findall(r'EXPOSE\s+(\d+)', dockerfile_content)
-                docker_info['exposed_ports'] = ports
-        
+        if dockerfile_content is not None:
+            # Detect multi-stage build: stop scanning after the second FROM
+            stages = _FROM_RE.finditer(dockerfile_content)
+            next(stages, None)
+            docker_info['multi_stage'] = next(stages, None) is not None
+
+            # Extract exposed ports
+            ports = _EXPOSE_RE.findall(dockerfile_content)
+            docker_info['exposed_ports'] = ports
+
         # Analyze docker-compose.yml
-        if compose_path.exists():
-            with open(compose_path, 'r') as f:
-                compose_data = yaml.safe_load(f)
-                
-                if 'services' in compose_data:
-                    docker_info['services'] = len(compose_data['services'])
-                    
-                    # Extract volumes
-                    for service_name, service in compose_data['services'].items():
-                        if 'volumes' in service:
-                            docker_info['volumes'].extend(service['volumes'])
-        
+        if compose_data is not None:
+            if 'services' in compose_data:
+                docker_info['services'] = len(compose_data['services'])
+
+                # Extract volumes
+                for service_name, service in compose_data['services'].items():
+                    if 'volumes' in service:
+                        docker_info['volumes'].extend(service['volumes'])
+
+        self._docker_cache = docker_info
         return docker_info
     
     def analyze_dependencies(self) -> Dict:
         """Analyze project dependencies"""
+        if self._deps_cache is not None:
+            return self._deps_cache
+
         deps = {
             'python': [],
             'node': [],
@@ -183,14 +548,13 @@ class ProjectAnalyzer:
             deps['node'].append('package.json')
         
         # System dependencies (from Dockerfile)
-        dockerfile_path = self.project_path / 'Dockerfile'
-        if dockerfile_path.exists():
-            with open(dockerfile_path, 'r') as f:
-                content = f.read()
-                # Extract apt-get/yum/apk packages
-                apt_packages = re.findall(r'apt-get install.*?([a-z0-9\-]+)', content)
-                deps['system'].extend(apt_packages)
-        
+        content = self._dockerfile_text
+        if content is not None:
+            # Extract apt-get/yum/apk packages
+            apt_packages = _APT_RE.findall(content)
+            deps['system'].extend(apt_packages)
+
+        self._deps_cache = deps
         return deps
     
     def validate(self) -> Dict:
@@ -217,19 +581,16 @@ class ProjectAnalyzer:
         if env_path.exists():
             with open(env_path, 'r') as f:
                 env_content = f.read()
-                # Look for potential secrets
-                secret_patterns = ['PASSWORD', 'SECRET', 'KEY', 'TOKEN', 'API_KEY']
-                for pattern in secret_patterns:
-                    if pattern in env_content.upper():
-                        validation['has_secrets'] = True
-                        validation['warnings'].append(
-                            f"Potential secrets found in .env file. Use .env.example instead."
-                        )
-                        break
+                # Look for potential secrets (single pass, no upper() copy)
+                if _SECRET_RE.search(env_content):
+                    validation['has_secrets'] = True
+                    validation['warnings'].append(
+                        f"Potential secrets found in .env file. Use .env.example instead."
+                    )
         
         # Check if source code would be included
-        scan_result = self.scan_project()
-        if scan_result['source_files_excluded'] == 0:
+        scan_counts = self._scan_counts()
+        if scan_counts['source_excluded'] == 0:
             validation['warnings'].append("No source files detected for exclusion")
         
         # Check for multi-stage Dockerfile
@@ -4,108 +4,152 @@ Strong cryptographic licensing with machine binding and offline validation
 """
 
 import os
+import re
 import json
+import mmap
 import hashlib
 import hmac
 import base64
 import uuid
+import platform
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Tuple, Optional
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
-from cryptography.hazmat.primitives import hashes, serialization
+from typing import Dict, List, Tuple, Optional
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+# orjson encodes/decodes the ~1 KB license structures several times
+# faster than stdlib json and returns bytes directly; optional
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps_sorted(data: Dict) -> bytes:
+    """Serialize a license payload to canonical sorted-key JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(data, sort_keys=True).encode('utf-8')
+
+
+def _loads(buf) -> Dict:
+    """Deserialize JSON from bytes, str or a buffer view"""
+    if orjson is not None:
+        return orjson.loads(buf)
+    if isinstance(buf, memoryview):
+        buf = buf.tobytes()
+    if isinstance(buf, (bytes, bytearray)):
+        buf = buf.decode('utf-8')
+    return json.loads(buf)
+
+
+# The standalone verifier script ships as sibling template data so its
+# ~5 KB of source never enters this module's code object
+_VERIFIER_TEMPLATE_PATH = Path(__file__).with_name('shiplock_verifier_template.py.in')
+
+_INTEGRITY_SALT = b'shiplock_integrity_salt_v1'
+
+# One uname() at import; platform.system()/release()/... each re-derive
+# from it per call (and processor() can shell out on some platforms)
+_UNAME = platform.uname()
+
+# Matches the whole 'Serial : ...' line so fingerprints stay identical
+# to what the old line-by-line scan produced
+_CPU_SERIAL_RE = re.compile(rb'^[^\n]*Serial[^\n]*', re.MULTILINE)
+
+# HMAC key-schedule midstate: the two salt-derived blocks are absorbed
+# once at import, so each integrity check only copies this state and
+# hashes the payload bytes (the midstate trick, applied to HMAC)
+_INTEGRITY_HMAC = hmac.new(_INTEGRITY_SALT, digestmod='sha256')
+
+
+def _integrity_digest(license_b64: str, signature_b64: str) -> str:
+    """Keyed integrity hash shared by generator and verifier"""
+    h = _INTEGRITY_HMAC.copy()
+    h.update(f"{license_b64}:{signature_b64}".encode())
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=8)
+def _load_public_key(public_key_b64: str) -> ed25519.Ed25519PublicKey:
+    """Decode a raw Ed25519 public key, memoized per distinct key
+
+    A fleet of containers verifies licenses signed by the same one or
+    two keys, so the decode happens once per key instead of per verify.
+    """
+    return ed25519.Ed25519PublicKey.from_public_bytes(
+        base64.b64decode(public_key_b64)
+    )
+
+
+@lru_cache(maxsize=1)
+def _load_verifier_template():
+    """Load (once) the verifier script template"""
+    from string import Template
+    return Template(_VERIFIER_TEMPLATE_PATH.read_text(encoding='utf-8'))
 
 
 class HardwareFingerprint:
-    """Generate hardware fingerprints for machine binding"""
-    
+    """Generate hardware fingerprints for machine binding
+
+    The probes below fork subprocesses (reg query, getmac, ...) costing
+    tens of milliseconds each, yet the answers can't change within a
+    process lifetime - so every probe is memoized. Call clear_cache()
+    to force a reprobe.
+    """
+
     @staticmethod
+    @lru_cache(maxsize=1)
     def get_machine_id() -> str:
         """
         Generate unique machine identifier based on hardware
         Combines multiple hardware attributes for robustness
         Cross-platform support for Linux, Windows, and macOS
+
+        The probes are independent and mostly block in subprocess or
+        file I/O (GIL released), so they fan out across a small thread
+        pool and the cold-start cost is the slowest probe rather than
+        the sum. Results are collected in submission order because the
+        fingerprint hash depends on component order.
         """
-        import platform
         import socket
-        
-        components = []
-        system = platform.system()
-        
-        # Hostname (always available)
-        try:
-            components.append(socket.gethostname())
-        except:
-            pass
-        
-        # Platform-specific identifiers
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        system = _UNAME.system
+
+        # Ordered probe list; each returns a component string or None
+        probes = [socket.gethostname]
+
         if system == 'Linux':
-            # Machine ID (systemd)
-            try:
-                with open('/etc/machine-id', 'r') as f:
-                    components.append(f.read().strip())
-            except:
-                pass
-            
-            # CPU ID (if available)
-            try:
-                with open('/proc/cpuinfo', 'r') as f:
-                    for line in f:
-                        if 'Serial' in line:
-                            components.append(line.strip())
-                            break
-            except:
-                pass
-        
+            probes.append(HardwareFingerprint._read_machine_id_file)
+            probes.append(HardwareFingerprint._read_cpu_serial)
         elif system == 'Windows':
-            # Windows-specific identifiers
-            try:
-                import subprocess
-                # Get machine GUID from Windows registry
-                result = subprocess.run(
-                    ['reg', 'query', 'HKEY_LOCAL_MACHINE\\SOFTWARE\\Microsoft\\Cryptography', '/v', 'MachineGuid'],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                if result.returncode == 0:
-                    for line in result.stdout.split('\n'):
-                        if 'MachineGuid' in line:
-                            guid = line.split()[-1] if line.split() else ''
-                            if guid:
-                                components.append(guid)
-                                break
-            except:
-                pass
-        
-        elif system == 'Darwin':  # macOS
-            # macOS-specific identifiers
-            try:
-                import subprocess
-                # Get hardware UUID
-                result = subprocess.run(
-                    ['system_profiler', 'SPHardwareDataType'],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                if result.returncode == 0:
-                    for line in result.stdout.split('\n'):
-                        if 'Hardware UUID' in line:
-                            uuid = line.split(':')[-1].strip() if ':' in line else ''
-                            if uuid:
-                                components.append(uuid)
-                                break
-            except:
-                pass
-        
-        # MAC Address (works on all platforms)
-        mac = HardwareFingerprint._get_mac_address()
-        if mac:
-            components.append(mac)
-        
+            probes.append(HardwareFingerprint._query_windows_machine_guid)
+        elif system == 'Darwin':
+            probes.append(HardwareFingerprint._query_darwin_hardware_uuid)
+
+        probes.append(HardwareFingerprint._get_mac_address)
+
+        components = []
+        deadline = time.monotonic() + 5.0
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(probe) for probe in probes]
+            for future in futures:
+                try:
+                    value = future.result(
+                        timeout=max(0.1, deadline - time.monotonic())
+                    )
+                except Exception:
+                    continue
+                if value:
+                    components.append(value)
+
         # If we don't have enough components, add more platform-agnostic identifiers
         if len(components) < 2:
             try:
@@ -120,23 +164,128 @@ class HardwareFingerprint:
         # Combine and hash
         if not components:
             # Fallback: use a combination that's at least somewhat unique
-            import platform as pl
             components = [
-                pl.node(),
-                pl.machine(),
-                pl.processor()[:50] if pl.processor() else 'unknown'
+                _UNAME.node,
+                _UNAME.machine,
+                _UNAME.processor[:50] if _UNAME.processor else 'unknown'
             ]
         
         combined = '|'.join(components)
         machine_id = hashlib.sha256(combined.encode()).hexdigest()
-        
+
         return machine_id
-    
+
+    @staticmethod
+    def _read_machine_id_file() -> Optional[str]:
+        """Read the systemd machine ID (Linux)"""
+        try:
+            with open('/etc/machine-id', 'r') as f:
+                return f.read().strip() or None
+        except:
+            return None
+
+    @staticmethod
+    def _read_cpu_serial() -> Optional[str]:
+        """Read the CPU serial from /proc/cpuinfo if present (Linux)
+
+        One capped binary read plus a precompiled regex instead of a
+        line-by-line text scan - /proc/cpuinfo runs to hundreds of KB
+        on many-core machines (and stat reports no size), so the read
+        is capped at 256 KB.
+        """
+        try:
+            with open('/proc/cpuinfo', 'rb') as f:
+                data = f.read(256 * 1024)
+        except OSError:
+            return None
+
+        match = _CPU_SERIAL_RE.search(data)
+        if match:
+            return match.group().decode(errors='replace').strip()
+        return None
+
+    @staticmethod
+    def _query_windows_machine_guid() -> Optional[str]:
+        """Get the machine GUID from the Windows registry
+
+        winreg reads the value in-process; the reg query subprocess
+        (100+ ms of fork/exec) is kept only as a last resort.
+        """
+        try:
+            import winreg
+            key = winreg.OpenKey(
+                winreg.HKEY_LOCAL_MACHINE,
+                r'SOFTWARE\Microsoft\Cryptography'
+            )
+            try:
+                guid, _ = winreg.QueryValueEx(key, 'MachineGuid')
+            finally:
+                winreg.CloseKey(key)
+            if guid:
+                return guid
+        except:
+            pass
+
+        try:
+            import subprocess
+            result = subprocess.run(
+                ['reg', 'query', 'HKEY_LOCAL_MACHINE\\SOFTWARE\\Microsoft\\Cryptography', '/v', 'MachineGuid'],
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+            if result.returncode == 0:
+                for line in result.stdout.split('\n'):
+                    if 'MachineGuid' in line:
+                        guid = line.split()[-1] if line.split() else ''
+                        if guid:
+                            return guid
+        except:
+            pass
+        return None
+
+    @staticmethod
+    def _query_darwin_hardware_uuid() -> Optional[str]:
+        """Get the hardware UUID (macOS)
+
+        gethostuuid(3) returns it without forking; the slow
+        system_profiler subprocess remains as a fallback. Uppercased to
+        match the system_profiler formatting existing licenses carry.
+        """
+        try:
+            import ctypes
+            import uuid as uuid_lib
+
+            libc = ctypes.CDLL('/usr/lib/libSystem.B.dylib', use_errno=True)
+            buf = ctypes.create_string_buffer(16)
+            timeout = (ctypes.c_int64 * 2)(5, 0)  # struct timespec
+            if libc.gethostuuid(buf, timeout) == 0:
+                return str(uuid_lib.UUID(bytes=buf.raw)).upper()
+        except:
+            pass
+
+        try:
+            import subprocess
+            result = subprocess.run(
+                ['system_profiler', 'SPHardwareDataType'],
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+            if result.returncode == 0:
+                for line in result.stdout.split('\n'):
+                    if 'Hardware UUID' in line:
+                        hw_uuid = line.split(':')[-1].strip() if ':' in line else ''
+                        if hw_uuid:
+                            return hw_uuid
+        except:
+            pass
+        return None
+
     @staticmethod
+    @lru_cache(maxsize=1)
     def _get_mac_address() -> Optional[str]:
         """Get MAC address of primary network interface"""
-        import platform
-        
         # Try netifaces first (more reliable)
         try:
             import netifaces
@@ -162,19 +311,24 @@ class HardwareFingerprint:
             # Other error, use fallback
             pass
         
-        # Fallback: use uuid.getnode() (works cross-platform)
+        # Fallback: use uuid.getnode() (works cross-platform). One hex
+        # format plus slicing instead of six .format calls and a
+        # reversed list; same byte order as before. Runs once per
+        # process thanks to the lru_cache, so JIT-compiling this
+        # formatting (suggested for watchdog-style polling) would only
+        # add compile latency.
         try:
             node = uuid.getnode()
             if node != 0:
-                mac = ':'.join(['{:02x}'.format((node >> i) & 0xff) 
-                               for i in range(0, 48, 8)][::-1])
-                if mac and mac != '00:00:00:00:00:00':
+                hx = f"{node:012x}"
+                mac = ':'.join(hx[i:i + 2] for i in range(0, 12, 2))
+                if mac != '00:00:00:00:00:00':
                     return mac
         except:
             pass
         
         # Windows-specific fallback
-        if platform.system() == 'Windows':
+        if _UNAME.system == 'Windows':
             try:
                 import subprocess
                 result = subprocess.run(
@@ -197,19 +351,25 @@ class HardwareFingerprint:
         return None
     
     @staticmethod
+    @lru_cache(maxsize=1)
     def get_system_info() -> Dict:
         """Get detailed system information"""
-        import platform
-        
         return {
-            'platform': platform.system(),
-            'platform_release': platform.release(),
-            'platform_version': platform.version(),
-            'architecture': platform.machine(),
-            'processor': platform.processor(),
-            'hostname': platform.node()
+            'platform': _UNAME.system,
+            'platform_release': _UNAME.release,
+            'platform_version': _UNAME.version,
+            'architecture': _UNAME.machine,
+            'processor': _UNAME.processor,
+            'hostname': _UNAME.node
         }
 
+    @staticmethod
+    def clear_cache():
+        """Drop memoized fingerprint data (e.g. after a NIC change)"""
+        HardwareFingerprint.get_machine_id.cache_clear()
+        HardwareFingerprint._get_mac_address.cache_clear()
+        HardwareFingerprint.get_system_info.cache_clear()
+
 
 class LicenseGenerator:
     """Generate cryptographically signed licenses"""
@@ -218,16 +378,28 @@ class LicenseGenerator:
         self.private_key = None
         self.public_key = None
         self.encryption_key = None
-        
-    def generate_keys(self) -> Tuple[bytes, bytes]:
-        """Generate RSA key pair for license signing"""
-        # Generate RSA private key (4096 bits for strong security)
-        self.private_key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=4096,
-            backend=default_backend()
+        self._public_key_b64 = None
+        self._key_id = None
+
+    def _cache_public_key(self):
+        """Cache the encoded public key; it is invariant across licenses"""
+        raw = self.public_key.public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
         )
-        
+        self._public_key_b64 = base64.b64encode(raw).decode('utf-8')
+        self._key_id = hashlib.sha256(raw).hexdigest()[:16]
+
+
+    def generate_keys(self) -> Tuple[bytes, bytes]:
+        """Generate Ed25519 key pair for license signing
+
+        Ed25519 signs and verifies orders of magnitude faster than the
+        RSA-4096/PSS scheme it replaces (keygen in microseconds instead
+        of seconds), with 32-byte public keys and 64-byte signatures.
+        """
+        self.private_key = ed25519.Ed25519PrivateKey.generate()
+
         self.public_key = self.private_key.public_key()
         
         # Serialize keys
@@ -251,7 +423,9 @@ class LicenseGenerator:
         
         # Generate symmetric encryption key
         self.encryption_key = Fernet.generate_key()
-        
+
+        self._cache_public_key()
+
         return private_pem, public_pem
     
     def load_keys(self):
@@ -271,9 +445,35 @@ class LicenseGenerator:
                     public_pem,
                     backend=default_backend()
                 )
+
+            # Key files from the old RSA-4096 scheme still parse above;
+            # fail with a pointer to regeneration instead of letting the
+            # raw-encoding cache below crash on an RSA key object
+            if not isinstance(self.private_key, ed25519.Ed25519PrivateKey):
+                self.private_key = None
+                self.public_key = None
+                raise ValueError(
+                    "Legacy RSA key pair found - ShipLock licensing now "
+                    "uses Ed25519. Regenerate the keys with generate_keys() "
+                    "(existing licenses must be re-signed)."
+                )
+
+            self._cache_public_key()
         except FileNotFoundError:
             # Generate new keys if not found
             self.generate_keys()
+
+    def unload_keys(self):
+        """Drop key material from the instance (secrets hygiene)
+
+        The loaded private key is cached on the instance so repeated
+        sign_license calls don't re-run the PEM passphrase decrypt;
+        call this when the generator outlives its signing work.
+        """
+        self.private_key = None
+        self.public_key = None
+        self._public_key_b64 = None
+        self._key_id = None
     
     def create_license(
         self,
@@ -293,7 +493,7 @@ class LicenseGenerator:
             'expires_at': expires or 'never',
             'machine_bound': machine_bound,
             'features': features or {},
-            'version': '1.0'
+            'version': '1.1'
         }
         
         if machine_bound:
@@ -305,36 +505,35 @@ class LicenseGenerator:
         return license_data
     
     def sign_license(self, license_data: Dict) -> str:
-        """Sign license with private key"""
+        """Sign license with private key
+
+        The payload is signed one-shot: Ed25519 hashes the message
+        internally in C (GIL released) and the cryptography API does
+        not expose a prehashed/streaming variant for it, so even a
+        multi-hundred-KB feature payload costs one pass with no extra
+        intermediate buffer beyond the canonical JSON bytes.
+        """
         if not self.private_key:
             self.load_keys()
         
-        # Convert to JSON
-        license_json = json.dumps(license_data, sort_keys=True)
-        license_bytes = license_json.encode('utf-8')
-        
-        # Create signature
-        signature = self.private_key.sign(
-            license_bytes,
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256()
-        )
+        # Convert to canonical JSON bytes
+        license_bytes = _dumps_sorted(license_data)
         
+        # Create signature (Ed25519 hashes internally; no padding args)
+        signature = self.private_key.sign(license_bytes)
+
         # Encode license and signature
         license_b64 = base64.b64encode(license_bytes).decode('utf-8')
         signature_b64 = base64.b64encode(signature).decode('utf-8')
-        
-        # Create final license structure
+
+        # Create final license structure; the raw 32-byte public key is
+        # ~1 KB smaller than the old PEM SubjectPublicKeyInfo blob and
+        # encoded once per generator rather than once per license
         signed_license = {
             'license': license_b64,
             'signature': signature_b64,
-            'public_key': self.public_key.public_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PublicFormat.SubjectPublicKeyInfo
-            ).decode('utf-8')
+            'key_id': self._key_id,
+            'public_key': self._public_key_b64
         }
         
         # Add obfuscated integrity check
@@ -342,20 +541,31 @@ class LicenseGenerator:
         signed_license['integrity'] = integrity_hash
         
         return json.dumps(signed_license, indent=2)
-    
+
+    def sign_licenses(self, licenses: List[Dict]) -> List[str]:
+        """Sign a batch of license payloads (bulk issuance)
+
+        Keys are loaded once up front so per-tenant signing doesn't
+        repeat the PEM decrypt. A process pool would suit the ~20 ms
+        RSA signs this was sized for, but an Ed25519 sign costs tens of
+        microseconds - far below fork/pickle overhead - so the batch
+        signs serially in-process.
+        """
+        if not self.private_key:
+            self.load_keys()
+
+        return [self.sign_license(license_data) for license_data in licenses]
+
     def _calculate_integrity(self, license_b64: str, signature_b64: str) -> str:
-        """Calculate integrity hash with obfuscation"""
-        # Combine license and signature
-        combined = f"{license_b64}:{signature_b64}"
-        
-        # Multiple rounds of hashing with salt
-        salt = b'shiplock_integrity_salt_v1'
-        
-        hash1 = hashlib.sha256(combined.encode() + salt).hexdigest()
-        hash2 = hashlib.sha512(hash1.encode() + salt).hexdigest()
-        hash3 = hashlib.sha256(hash2.encode() + salt).hexdigest()
-        
-        return hash3
+        """Calculate keyed integrity hash
+
+        One HMAC-SHA256 over the raw payload replaces the old
+        sha256/sha512/sha256 chain - a single pass that OpenSSL runs on
+        SHA-NI/ARMv8-SHA2 hardware where available, with no hex-encode
+        round trips between rounds. The salt midstate is precomputed at
+        module import.
+        """
+        return _integrity_digest(license_b64, signature_b64)
     
     def write_license(self, signed_license: str, output_path: str):
         """Write license to file"""
@@ -365,17 +575,18 @@ class LicenseGenerator:
         # Also create a binary version with additional obfuscation
         binary_path = output_path.replace('.key', '.bin')
         
-        # Encrypt the license
-        encryption_key = Fernet.generate_key()
-        cipher = Fernet(encryption_key)
-        encrypted = cipher.encrypt(signed_license.encode('utf-8'))
-        
+        # Encrypt the license. AES-GCM runs on AES-NI/CLMUL via OpenSSL
+        # and skips the base64 inflation of Fernet's CBC+HMAC stack
+        key = AESGCM.generate_key(bit_length=128)
+        nonce = os.urandom(12)
+        ciphertext = AESGCM(key).encrypt(nonce, signed_license.encode('utf-8'), None)
+
         with open(binary_path, 'wb') as f:
-            # Write key XORed with a known pattern
-            xor_key = bytes([k ^ 0xAB for k in encryption_key])
+            # Write key XORed with a known pattern, then nonce and body
+            xor_key = bytes([k ^ 0xAB for k in key])
             f.write(xor_key)
-            f.write(b'\x00' * 16)  # Separator
-            f.write(encrypted)
+            f.write(nonce)
+            f.write(ciphertext)
 
 
 class LicenseVerifier:
@@ -384,53 +595,66 @@ class LicenseVerifier:
     def __init__(self):
         self.public_key = None
         
-    def verify(self, license_file: str) -> Tuple[bool, Dict]:
+    def verify(self, license_file: str, fast_verify: bool = False) -> Tuple[bool, Dict]:
         """
         Verify license file
         Returns (is_valid, details)
+
+        With fast_verify=True the asymmetric signature check is skipped
+        and only the integrity HMAC, expiry and machine binding are
+        validated - microseconds instead of an Ed25519 verify. The HMAC
+        key is a constant that also ships in every generated verifier,
+        so this mode detects accidental corruption only: anyone can
+        recompute the tag for a modified payload. It must never gate
+        anything security-relevant - enforcement paths (activation,
+        container start) need the full signature check.
         """
         try:
-            # Load license
-            with open(license_file, 'r') as f:
-                signed_license = json.loads(f.read())
+            # Load license; mmap feeds the parser straight from the
+            # page cache instead of a user-space read copy
+            with open(license_file, 'rb') as f:
+                try:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (ValueError, OSError):
+                    # Zero-length or unmappable file
+                    signed_license = _loads(f.read())
+                else:
+                    with mm:
+                        view = memoryview(mm)
+                        try:
+                            signed_license = _loads(view)
+                        finally:
+                            view.release()
             
             # Extract components
             license_b64 = signed_license['license']
             signature_b64 = signed_license['signature']
-            public_key_pem = signed_license['public_key']
+            public_key_b64 = signed_license['public_key']
             integrity = signed_license['integrity']
-            
-            # Verify integrity first
+
+            # Verify integrity first (constant-time; str equality
+            # short-circuits and leaks a timing oracle on the tag)
             expected_integrity = self._calculate_integrity(license_b64, signature_b64)
-            if integrity != expected_integrity:
+            if not hmac.compare_digest(integrity, expected_integrity):
                 return False, {'reason': 'Integrity check failed - license may be tampered'}
-            
-            # Load public key
-            self.public_key = serialization.load_pem_public_key(
-                public_key_pem.encode('utf-8'),
-                backend=default_backend()
-            )
-            
-            # Decode license and signature
+
+            # Decode license payload
             license_bytes = base64.b64decode(license_b64)
-            signature = base64.b64decode(signature_b64)
-            
-            # Verify signature
-            try:
-                self.public_key.verify(
-                    signature,
-                    license_bytes,
-                    padding.PSS(
-                        mgf=padding.MGF1(hashes.SHA256()),
-                        salt_length=padding.PSS.MAX_LENGTH
-                    ),
-                    hashes.SHA256()
-                )
-            except Exception as e:
-                return False, {'reason': f'Signature verification failed: {str(e)}'}
+
+            if not fast_verify:
+                # Load raw 32-byte Ed25519 public key (memoized per key)
+                self.public_key = _load_public_key(public_key_b64)
+
+                signature = base64.b64decode(signature_b64)
+
+                # Verify signature
+                try:
+                    self.public_key.verify(signature, license_bytes)
+                except Exception as e:
+                    return False, {'reason': f'Signature verification failed: {str(e)}'}
             
             # Parse license data
-            license_data = json.loads(license_bytes.decode('utf-8'))
+            license_data = _loads(license_bytes)
             
             # Verify expiration
             if license_data['expires_at'] != 'never':
@@ -469,210 +693,23 @@ class LicenseVerifier:
             return False, {'reason': f'Verification error: {str(e)}'}
     
     def _calculate_integrity(self, license_b64: str, signature_b64: str) -> str:
-        """Calculate integrity hash (must match generator)"""
-        combined = f"{license_b64}:{signature_b64}"
-        salt = b'shiplock_integrity_salt_v1'
-        
-        hash1 = hashlib.sha256(combined.encode() + salt).hexdigest()
-        hash2 = hashlib.sha512(hash1.encode() + salt).hexdigest()
-        hash3 = hashlib.sha256(hash2.encode() + salt).hexdigest()
-        
-        return hash3
+        """Calculate keyed integrity hash (must match generator)"""
+        return _integrity_digest(license_b64, signature_b64)
     
     def create_verification_script(self, output_path: str):
         """
         Create standalone verification script for embedding in Docker containers
         This script is obfuscated and difficult to bypass
-        """
-        import platform
-        
-        # More robust license verification script
-        verification_code = """#!/usr/bin/env python3
-# ShipLock License Verifier
-# DO NOT MODIFY - Integrity protected
-
-import os
-import sys
-import json
-import base64
-import hashlib
-from datetime import datetime
-from pathlib import Path
-
-def verify_license_file(license_file_path):
-    '''Verify license file using cryptographic signatures'''
-    try:
-        from cryptography.hazmat.primitives.asymmetric import padding
-        from cryptography.hazmat.primitives import hashes, serialization
-        from cryptography.hazmat.backends import default_backend
-    except ImportError:
-        print("ERROR: cryptography library not found. Install with: pip install cryptography")
-        return False, "Missing cryptography library"
-    
-    try:
-        # Load license file
-        license_path = Path(license_file_path)
-        if not license_path.exists():
-            return False, f"License file not found: {license_file_path}"
-        
-        with open(license_path, 'r') as f:
-            signed_license = json.loads(f.read())
-        
-        # Extract components
-        license_b64 = signed_license.get('license')
-        signature_b64 = signed_license.get('signature')
-        public_key_pem = signed_license.get('public_key')
-        integrity = signed_license.get('integrity')
-        
-        if not all([license_b64, signature_b64, public_key_pem, integrity]):
-            return False, "Invalid license file format"
-        
-        # Verify integrity hash first
-        combined = f"{license_b64}:{signature_b64}"
-        salt = b'shiplock_integrity_salt_v1'
-        hash1 = hashlib.sha256(combined.encode() + salt).hexdigest()
-        hash2 = hashlib.sha512(hash1.encode() + salt).hexdigest()
-        hash3 = hashlib.sha256(hash2.encode() + salt).hexdigest()
-        
-        if integrity != hash3:
-            return False, "Integrity check failed - license may be tampered"
-        
-        # Load public key and verify signature
-        try:
-            public_key = serialization.load_pem_public_key(
-                public_key_pem.encode('utf-8'),
-                backend=default_backend()
-            )
-        except Exception as e:
-            return False, f"Failed to load public key: {str(e)}"
-        
-        # Decode license and signature
-        try:
-            license_bytes = base64.b64decode(license_b64)
-            signature = base64.b64decode(signature_b64)
-        except Exception as e:
-            return False, f"Failed to decode license data: {str(e)}"
-        
-        # Verify cryptographic signature
-        try:
-            public_key.verify(
-                signature,
-                license_bytes,
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.MAX_LENGTH
-                ),
-                hashes.SHA256()
-            )
-        except Exception as e:
-            return False, f"Signature verification failed: {str(e)}"
-        
-        # Parse license data
-        try:
-            license_data = json.loads(license_bytes.decode('utf-8'))
-        except Exception as e:
-            return False, f"Failed to parse license data: {str(e)}"
-        
-        # Check expiration
-        if license_data.get('expires_at') != 'never':
-            try:
-                expiry_date = datetime.fromisoformat(license_data['expires_at'])
-                if datetime.now() > expiry_date:
-                    return False, f"License expired on {license_data['expires_at']}"
-            except (ValueError, KeyError) as e:
-                return False, f"Invalid expiration date: {str(e)}"
-        
-        # Verify machine binding if enabled
-        if license_data.get('machine_bound', False):
-            machine_id = license_data.get('machine_id', '')
-            if machine_id:
-                # Calculate current machine ID
-                try:
-                    import socket
-                    import uuid as uuid_lib
-                    components = []
-                    
-                    # Get hostname
-                    try:
-                        components.append(socket.gethostname())
-                    except:
-                        pass
-                    
-                    # Get machine ID
-                    try:
-                        if os.path.exists('/etc/machine-id'):
-                            with open('/etc/machine-id', 'r') as f:
-                                components.append(f.read().strip())
-                    except:
-                        pass
-                    
-                    # Get MAC address
-                    try:
-                        mac = ':'.join(['{:02x}'.format((uuid_lib.getnode() >> i) & 0xff) 
-                                       for i in range(0, 48, 8)][::-1])
-                        components.append(mac)
-                    except:
-                        pass
-                    
-                    # Calculate fingerprint
-                    combined = '|'.join(components)
-                    current_machine_id = hashlib.sha256(combined.encode()).hexdigest()
-                    
-                    if current_machine_id != machine_id:
-                        return False, "License not valid for this machine (machine binding mismatch)"
-                except Exception as e:
-                    # If machine ID calculation fails, warn but don't fail (for compatibility)
-                    print(f"WARNING: Could not verify machine binding: {str(e)}")
-        
-        # License is valid
-        return True, license_data
-        
-    except json.JSONDecodeError as e:
-        return False, f"Invalid license file format (JSON error): {str(e)}"
-    except Exception as e:
-        return False, f"Verification error: {str(e)}"
-
-
-def main():
-    '''Main entry point'''
-    if len(sys.argv) < 2:
-        print("Usage: verify_license.py <license_file>")
-        sys.exit(1)
-    
-    license_file = sys.argv[1]
-    
-    # If relative path, try to find in common locations
-    if not os.path.isabs(license_file) and not Path(license_file).exists():
-        # Try parent directory
-        parent_license = Path(__file__).parent.parent / license_file
-        if parent_license.exists():
-            license_file = str(parent_license)
-        # Try current directory
-        elif Path(license_file).exists():
-            license_file = os.path.abspath(license_file)
-    
-    is_valid, result = verify_license_file(license_file)
-    
-    if not is_valid:
-        print(f"License validation failed: {result}")
-        sys.exit(1)
-    
-    # Print license info if it's a dict
-    if isinstance(result, dict):
-        print("License verified successfully!")
-        print(f"Product: {result.get('product_id', 'Unknown')}")
-        print(f"Client: {result.get('client', 'Unknown')}")
-        print(f"Expires: {result.get('expires_at', 'Never')}")
-    else:
-        print("License OK")
-    
-    sys.exit(0)
 
+        The script body ships as sibling template data
+        (shiplock_verifier_template.py.in) rather than a triple-quoted
+        literal, keeping ~5 KB of source out of this module's code
+        object; emission is a read + salt substitution.
+        """
+        verification_code = _load_verifier_template().substitute(
+            integrity_salt="b'shiplock_integrity_salt_v1'"
+        )
 
-if __name__ == '__main__':
-    main()
-"""
-        
         output_file = Path(output_path)
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
@@ -680,13 +717,19 @@ if __name__ == '__main__':
             f.write(verification_code)
         
         # Make executable (Unix/Linux/Mac only)
-        if platform.system() != 'Windows':
+        if _UNAME.system != 'Windows':
             os.chmod(output_file, 0o755)
 
 
 class LicenseActivation:
     """Handle license activation and machine binding"""
-    
+
+    # Resolved once; Path.home() re-reads HOME on every construction
+    _activation_file = Path.home() / '.shiplock' / 'activation.json'
+
+    # Tri-state stat cache: None = not yet checked this process
+    _activation_cached: Optional[bool] = None
+
     @staticmethod
     def activate_license(license_file: str) -> bool:
         """Activate license on current machine"""
@@ -705,18 +748,48 @@ class LicenseActivation:
             'license_id': details['license_id']
         }
         
-        # Store activation
-        activation_file = Path.home() / '.shiplock' / 'activation.json'
+        # Store activation. Encode once (compact - the file is machine
+        # read), fsync, then rename into place so a crash mid-write
+        # never leaves a torn activation file
+        activation_file = LicenseActivation._activation_file
         activation_file.parent.mkdir(exist_ok=True)
-        
-        with open(activation_file, 'w') as f:
-            json.dump(activation_record, f, indent=2)
-        
+
+        if orjson is not None:
+            payload = orjson.dumps(activation_record)
+        else:
+            payload = json.dumps(activation_record).encode('utf-8')
+
+        tmp_file = activation_file.with_suffix('.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, activation_file)
+
+        LicenseActivation._activation_cached = True
+
         print("License activated successfully!")
         return True
-    
+
     @staticmethod
     def is_activated() -> bool:
-        """Check if license is already activated"""
-        activation_file = Path.home() / '.shiplock' / 'activation.json'
-        return activation_file.exists()
+        """Check if license is already activated
+
+        The first call stats the activation file; subsequent calls
+        (watchdog polling loops) return the in-memory flag, which only
+        activate_license/deactivate_license mutate.
+        """
+        if LicenseActivation._activation_cached is None:
+            LicenseActivation._activation_cached = (
+                LicenseActivation._activation_file.exists()
+            )
+        return LicenseActivation._activation_cached
+
+    @staticmethod
+    def deactivate_license():
+        """Remove the activation record and reset the cached state"""
+        try:
+            LicenseActivation._activation_file.unlink()
+        except FileNotFoundError:
+            pass
+        LicenseActivation._activation_cached = False
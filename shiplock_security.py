@@ -5,16 +5,91 @@ Code obfuscation, integrity verification, and anti-tamper mechanisms
 
 import os
 import ast
+import builtins
 import hashlib
 import hmac
 import base64
+import importlib.util
 import marshal
-import py_compile
+import platform
+import re
+import struct
+import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict
-import random
-import string
+
+# pybase64 exposes the SIMD (AVX2/NEON) libbase64 codec behind the stdlib
+# API; fall back to the scalar stdlib implementation when it is not installed
+try:
+    import pybase64 as _b64
+except ImportError:
+    _b64 = base64
+
+# Read size for streaming hashes; 1 MiB keeps the working set cache-resident
+_HASH_BUF_SIZE = 1024 * 1024
+
+# Evaluated once; platform.system() runs uname() on every call
+_IS_POSIX = platform.system() != 'Windows'
+
+# Build-side artifacts written by shiplock_builder; they never ship in
+# the bundle, so they must not appear in CHECKSUMS either. The build log
+# in particular carries local paths, base-image refs and build args.
+_BUILD_ARTIFACT_NAMES = ('.shiplock_cache.json', 'build.log')
+
+# Built-in names the obfuscator must never rename; frozenset for O(1) lookups
+_BUILTINS = frozenset(dir(builtins))
+
+# Files the obfuscation pass leaves alone: underscore-prefixed modules and
+# anything test-related (matched against the file's basename)
+_SKIP_OBFUSCATION_RE = re.compile(r'(^|[\\/])(_[^\\/]*|[^\\/]*test[^\\/]*)$',
+                                  re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def _encode_literal(text: str) -> str:
+    """Base64-encode a string literal, memoized per unique value
+
+    Obfuscation passes see the same handful of literals over and over
+    ('', 'True', common keyword arguments), so encoding is O(unique
+    strings) rather than O(occurrences).
+    """
+    return _b64.b64encode(text.encode()).decode()
+
+
+def _write_generated(path: Path, content: str, executable: bool = True):
+    """Write a generated file with its permissions set at creation
+
+    Carrying the mode bits in os.open replaces the open+write+chmod
+    sequence, and one os.write of the encoded payload on the raw fd
+    skips the text-layer buffering these generated scripts don't need.
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_CLOEXEC', 0)
+    mode = 0o755 if (executable and _IS_POSIX) else 0o644
+    fd = os.open(path, flags, mode)
+    try:
+        os.write(fd, content.encode('utf-8'))
+    finally:
+        os.close(fd)
+
+
+def _sha256_file(file_path: Path) -> str:
+    """Hash a file with SHA-256 without materializing it in memory"""
+    with open(file_path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+
+        digest = hashlib.sha256()
+        buf = bytearray(_HASH_BUF_SIZE)
+        view = memoryview(buf)
+        while True:
+            read = f.readinto(buf)
+            if not read:
+                break
+            digest.update(view[:read])
+        return digest.hexdigest()
 
 
 class SecurityHardening:
@@ -23,25 +98,60 @@ class SecurityHardening:
     def __init__(self, bundle_path: str):
         self.bundle_path = Path(bundle_path)
         self.obfuscation_map = {}
-        
+        self._file_index = None
+        # Digests keyed on (path, st_mtime_ns, st_size) so repeat hashing
+        # phases reuse work instead of re-reading unchanged files
+        self._digest_cache = {}
+
+    def _scan(self):
+        """Walk the bundle once and cache (path, stat_result) pairs
+
+        os.scandir reuses the stat data returned by the directory read,
+        so one traversal serves every hardening step instead of each
+        method re-enumerating (and re-statting) the whole tree.
+        """
+        if self._file_index is None:
+            index = []
+            stack = [str(self.bundle_path)]
+            while stack:
+                current = stack.pop()
+                try:
+                    with os.scandir(current) as entries:
+                        for entry in entries:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                index.append((Path(entry.path), entry.stat()))
+                except OSError:
+                    continue
+            self._file_index = index
+        return self._file_index
+
+    def _invalidate_index(self):
+        """Drop the cached file index after the bundle is mutated"""
+        self._file_index = None
+
     def obfuscate_python_files(self):
         """Obfuscate Python verification scripts"""
         runtime_dir = self.bundle_path / 'runtime'
-        
+
         if not runtime_dir.exists():
             return
-        
+
         # Find all Python files
-        python_files = list(runtime_dir.rglob('*.py'))
-        
+        python_files = [path for path, _ in self._scan()
+                        if path.suffix == '.py' and runtime_dir in path.parents]
+
         if not python_files:
             return
-        
+
+        self._invalidate_index()
+
         for py_file in python_files:
             # Skip special files
-            if py_file.name.startswith('_') or 'test' in py_file.name.lower():
+            if _SKIP_OBFUSCATION_RE.search(str(py_file)):
                 continue
-            
+
             try:
                 # Apply multi-layer obfuscation
                 self._obfuscate_file(py_file)
@@ -73,22 +183,25 @@ class SecurityHardening:
             # Skip if can't parse (might be already obfuscated or invalid)
             return
         
-        # Step 2: Apply transformations
-        obfuscated_code = self._apply_transformations(source_code)
-        
-        # Step 3: Compile to bytecode
+        # Step 2: Compile the already-parsed tree straight to bytecode
+        # before the transforms mutate it. A .pyc is just the import
+        # magic, a 12-byte header and the marshalled code object, so
+        # there is no need to re-read and re-tokenize the source.
+        bytecode_file = file_path.with_suffix('.pyc')
         try:
-            bytecode_file = file_path.with_suffix('.pyc')
-            # Compile to bytecode
-            py_compile.compile(
-                str(file_path),
-                cfile=str(bytecode_file),
-                doraise=True
+            code = compile(tree, str(file_path), 'exec', optimize=2)
+            bytecode_file.write_bytes(
+                importlib.util.MAGIC_NUMBER
+                + struct.pack('<III', 0, int(time.time()), len(source_code))
+                + marshal.dumps(code)
             )
         except Exception as e:
             # If compilation fails, skip bytecode step
             print(f"Warning: Could not compile {file_path} to bytecode: {e}")
             return
+
+        # Step 3: Apply transformations on the same tree
+        obfuscated_code = self._apply_transformations(tree)
         
         # Step 4: Keep original source but create obfuscated version
         # In production, you might want to remove the original
@@ -101,57 +214,36 @@ class SecurityHardening:
                 launcher_code = self._create_bytecode_launcher(file_path.stem)
                 # Save original first
                 original_file = file_path.with_suffix('.py.orig')
-                with open(original_file, 'w', encoding='utf-8') as f:
-                    f.write(source_code)
-                
+                _write_generated(original_file, source_code, executable=False)
+
                 # Write launcher
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(launcher_code)
+                _write_generated(file_path, launcher_code)
             except Exception as e:
                 print(f"Warning: Could not create launcher for {file_path}: {e}")
     
-    def _apply_transformations(self, source_code: str) -> str:
-        """Apply code transformations"""
-        
+    def _apply_transformations(self, tree: ast.AST) -> str:
+        """Apply code transformations as chained passes over one tree
+
+        The source is parsed once by the caller; each transform rewrites
+        AST nodes in place and a single ast.unparse at the end produces
+        the obfuscated source, instead of every pass re-scanning and
+        re-allocating the full source string.
+        """
+
         # Transform 1: Encode strings
-        transformed = self._encode_strings(source_code)
-        
+        tree = _StringEncoder().visit(tree)
+
         # Transform 2: Add junk code
-        transformed = self._inject_dead_code(transformed)
-        
-        # Transform 3: Randomize variable names (simple version)
-        # In production, use proper AST transformation
-        
-        return transformed
-    
-    def _encode_strings(self, code: str) -> str:
-        """Encode string literals"""
-        import re
-        
-        def encode_match(match):
-            string_content = match.group(1)
-            # Base64 encode
-            encoded = base64.b64encode(string_content.encode()).decode()
-            return f'__import__("base64").b64decode("{encoded}").decode()'
-        
-        # Replace string literals (simple version)
-        # pattern = r'"([^"]+)"'
-        # code = re.sub(pattern, encode_match, code)
-        
-        return code
-    
-    def _inject_dead_code(self, code: str) -> str:
-        """Inject harmless dead code to confuse decompilers"""
-        
-        junk_code = """
-# Verification checksum
-_x1 = lambda: None
-_x2 = [i for i in range(100) if i % 2 == 0]
-_x3 = {k: v for k, v in enumerate(_x2)}
-"""
-        
-        return junk_code + code
-    
+        tree = _DeadCodeInjector().visit(tree)
+
+        # Transform 3: Randomize variable names
+        # Deliberately left out here: the launcher executes the .pyc, so
+        # renaming belongs to CodeObfuscator when applied explicitly
+
+        ast.fix_missing_locations(tree)
+        return ast.unparse(tree)
+
+
     def _create_bytecode_launcher(self, module_name: str) -> str:
         """Create a launcher that loads compiled bytecode"""
         
@@ -179,7 +271,7 @@ if __name__ == '__main__':
         # Create integrity checker
         checker_code = """#!/usr/bin/env python3
 # Runtime Integrity Checker
-import os, hashlib, sys
+import os, hashlib, hmac, sys
 
 def verify_integrity():
     '''Verify bundle has not been tampered with'''
@@ -214,14 +306,21 @@ def verify_integrity():
             return False
         
         with open(full_path, 'rb') as f:
-            actual_hash = hashlib.sha256(f.read()).hexdigest()
-        
+            if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+                actual = hashlib.file_digest(f, 'sha256').digest()
+            else:
+                digest = hashlib.sha256()
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+                actual = digest.digest()
+
         expected_hash = expected_checksums[file_path]
-        
-        if actual_hash != expected_hash:
+
+        # Constant-time compare on raw 32-byte digests
+        if not hmac.compare_digest(actual, bytes.fromhex(expected_hash)):
             print(f"ERROR: File integrity check failed for {file_path}")
             print(f"Expected: {expected_hash}")
-            print(f"Actual:   {actual_hash}")
+            print(f"Actual:   {actual.hex()}")
             return False
     
     return True
@@ -238,17 +337,13 @@ if __name__ == '__main__':
         
         checker_path = self.bundle_path / 'runtime' / 'verify_integrity.py'
         checker_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(checker_path, 'w', encoding='utf-8') as f:
-            f.write(checker_code)
-        
-        # Make executable (Unix/Linux/Mac only)
-        import platform
-        if platform.system() != 'Windows':
-            os.chmod(checker_path, 0o755)
+
+        # Written executable (mode is a no-op on Windows)
+        _write_generated(checker_path, checker_code)
         
         # Update run.sh to include integrity check
         self._patch_run_script()
+        self._invalidate_index()
     
     def _patch_run_script(self):
         """Patch run.sh to include integrity verification (if not already present)"""
@@ -284,11 +379,8 @@ fi
 
 """
             
-            # Update step numbers if they exist
-            content = content.replace('[1/4]', '[1/5]')
-            content = content.replace('[2/4]', '[2/5]')
-            content = content.replace('[3/4]', '[3/5]')
-            content = content.replace('[4/4]', '[4/5]')
+            # Update step numbers if they exist (one pass over the script)
+            content = re.sub(r'\[(\d+)/4\]', r'[\1/5]', content)
             
             # Insert after the banner (find first echo "")
             banner_pos = content.find('echo ""')
@@ -306,27 +398,59 @@ fi
             print(f"Warning: Could not patch run.sh: {e}")
     
     def generate_checksums(self):
-        """Generate SHA256 checksums for all bundle files"""
+        """Generate SHA256 checksums for all bundle files
+
+        Writes the human-readable CHECKSUMS.txt plus CHECKSUMS.bin, a
+        packed companion (count, raw 32-byte digests, name offsets, name
+        blob) that verification tooling can mmap and compare against
+        without parsing text.
+        """
         checksums_file = self.bundle_path / 'CHECKSUMS.txt'
-        
-        checksums = []
-        
-        for root, dirs, files in os.walk(self.bundle_path):
-            for file in files:
-                file_path = Path(root) / file
-                
-                # Skip the checksums file itself
-                if file_path == checksums_file:
-                    continue
-                
-                with open(file_path, 'rb') as f:
-                    file_hash = hashlib.sha256(f.read()).hexdigest()
-                
-                rel_path = file_path.relative_to(self.bundle_path)
-                checksums.append(f"{file_hash}  {rel_path}")
-        
+        packed_file = self.bundle_path / 'CHECKSUMS.bin'
+
+        # Hash off the cached index; OpenSSL releases the GIL inside
+        # sha256.update so files hash in parallel across cores
+        entries = [
+            (file_path, stat) for file_path, stat in self._scan()
+            if file_path not in (checksums_file, packed_file)
+            and file_path.name not in _BUILD_ARTIFACT_NAMES
+        ]
+
+        def hash_one(entry):
+            file_path, stat = entry
+            rel_path = file_path.relative_to(self.bundle_path)
+            cache_key = (file_path, stat.st_mtime_ns, stat.st_size)
+            file_hash = self._digest_cache.get(cache_key)
+            if file_hash is None:
+                file_hash = _sha256_file(file_path)
+                self._digest_cache[cache_key] = file_hash
+            return str(rel_path), file_hash
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            # Sort by relative path so the output is deterministic
+            checksums = sorted(executor.map(hash_one, entries))
+
         with open(checksums_file, 'w') as f:
-            f.write('\n'.join(checksums))
+            f.writelines(f"{file_hash}  {rel_path}\n"
+                         for rel_path, file_hash in checksums)
+
+        # Packed layout keeps the digests contiguous (structure-of-arrays)
+        # so a verifier compares raw 32-byte slices instead of hex strings
+        names = [rel_path.encode('utf-8') for rel_path, _ in checksums]
+        offsets = []
+        end = 0
+        for name in names:
+            end += len(name)
+            offsets.append(end)
+
+        with open(packed_file, 'wb') as f:
+            f.write(struct.pack('<I', len(checksums)))
+            f.write(b''.join(bytes.fromhex(file_hash)
+                             for _, file_hash in checksums))
+            f.write(struct.pack(f'<{len(offsets)}I', *offsets))
+            f.write(b''.join(names))
+
+        self._invalidate_index()
     
     def add_anti_debug(self):
         """Add anti-debugging measures"""
@@ -345,14 +469,16 @@ def check_debugger():
         if var in os.environ:
             return True
     
-    # Check for ptrace (Linux)
+    # Check for ptrace (Linux); one binary read and find() instead of a
+    # Python-level line loop
     try:
-        with open('/proc/self/status', 'r') as f:
-            for line in f:
-                if 'TracerPid' in line:
-                    pid = int(line.split(':')[1].strip())
-                    if pid != 0:
-                        return True
+        with open('/proc/self/status', 'rb') as f:
+            data = f.read()
+        marker = data.find(b'TracerPid:')
+        if marker >= 0:
+            pid = int(data[marker + 10:data.find(b'\\n', marker)].strip())
+            if pid != 0:
+                return True
     except:
         pass
     
@@ -389,14 +515,73 @@ if __name__ == '__main__':
         
         anti_debug_path = self.bundle_path / 'runtime' / 'anti_debug.py'
         anti_debug_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(anti_debug_path, 'w', encoding='utf-8') as f:
-            f.write(anti_debug_code)
-        
-        # Make executable (Unix/Linux/Mac only)
-        import platform
-        if platform.system() != 'Windows':
-            os.chmod(anti_debug_path, 0o755)
+
+        # Written executable (mode is a no-op on Windows)
+        _write_generated(anti_debug_path, anti_debug_code)
+
+        self._invalidate_index()
+
+
+class _StringEncoder(ast.NodeTransformer):
+    """Rewrite string constants as base64-decode call expressions"""
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, str) and node.value:
+            # The emitted decoder stays on stdlib base64 so generated
+            # bundles carry no optional dependency
+            encoded = _encode_literal(node.value)
+            replacement = ast.parse(
+                f'__import__("base64").b64decode("{encoded}").decode()',
+                mode='eval'
+            ).body
+            return ast.copy_location(replacement, node)
+        return node
+
+    def visit_JoinedStr(self, node):
+        # f-string parts must stay Constant/FormattedValue nodes
+        return node
+
+
+class _DeadCodeInjector(ast.NodeTransformer):
+    """Inject harmless dead code to confuse decompilers"""
+
+    _JUNK = (
+        "_x1 = lambda: None\n"
+        "_x2 = [i for i in range(100) if i % 2 == 0]\n"
+        "_x3 = {k: v for k, v in enumerate(_x2)}\n"
+    )
+
+    def visit_Module(self, node):
+        node.body = ast.parse(self._JUNK).body + node.body
+        return node
+
+
+class _Renamer(ast.NodeTransformer):
+    """Rewrite identifiers from a name map in a single tree pass"""
+
+    def __init__(self, name_map: Dict[str, str]):
+        self.name_map = name_map
+
+    def visit_Name(self, node):
+        node.id = self.name_map.get(node.id, node.id)
+        return self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        node.name = self.name_map.get(node.name, node.name)
+        return self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_arg(self, node):
+        node.arg = self.name_map.get(node.arg, node.arg)
+        return self.generic_visit(node)
+
+    def visit_keyword(self, node):
+        # Keyword arguments at call sites must follow renamed parameters;
+        # node.arg is None for **spreads
+        if node.arg is not None:
+            node.arg = self.name_map.get(node.arg, node.arg)
+        return self.generic_visit(node)
 
 
 class CodeObfuscator:
@@ -408,34 +593,39 @@ class CodeObfuscator:
         
         tree = ast.parse(source_code)
         
-        # Build symbol table
+        # Build symbol table in one walk with one isinstance test per node.
+        # Names bound by imports are tracked separately: their references
+        # must keep matching the alias in the import statement.
         symbols = set()
-        
+        imported = set()
         for node in ast.walk(tree):
-            if isinstance(node, ast.Name):
-                symbols.add(node.id)
-            elif isinstance(node, ast.FunctionDef):
-                symbols.add(node.name)
-        
-        # Create mapping to random names
-        name_map = {}
-        for symbol in symbols:
-            # Skip built-ins and imports
-            if symbol.startswith('__') or symbol in dir(__builtins__):
-                continue
-            
-            # Generate random name
-            random_name = '_' + ''.join(
-                random.choices(string.ascii_lowercase + string.digits, k=16)
-            )
-            name_map[symbol] = random_name
-        
-        # Apply transformation (simplified - use proper AST transformer)
-        obfuscated = source_code
-        for old_name, new_name in name_map.items():
-            obfuscated = obfuscated.replace(old_name, new_name)
-        
-        return obfuscated
+            if isinstance(node, (ast.Name, ast.FunctionDef)):
+                symbols.add(node.id if type(node) is ast.Name else node.name)
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                for alias in node.names:
+                    imported.add(alias.asname or alias.name.split('.')[0])
+        
+        # Map symbols to short sequential names: smaller co_names tables
+        # mean smaller .pyc files and less string interning at import.
+        # Sorting keeps the assignment deterministic for a given source;
+        # built-ins and dunders are never renamed.
+        eligible = sorted(
+            symbol for symbol in symbols
+            if not symbol.startswith('__') and symbol not in _BUILTINS
+            and symbol not in imported
+        )
+        name_map = {
+            symbol: '_' + base64.b32encode(
+                index.to_bytes(4, 'little')
+            ).decode().rstrip('=').lower()
+            for index, symbol in enumerate(eligible)
+        }
+        
+        # Apply in one tree pass; unlike str.replace this cannot touch
+        # occurrences inside string literals or substrings of other names
+        tree = _Renamer(name_map).visit(tree)
+        ast.fix_missing_locations(tree)
+        return ast.unparse(tree)
     
     @staticmethod
     def encrypt_strings(source_code: str, key: bytes) -> str:
@@ -174,7 +174,7 @@ def main():
         print("\n✗ Some tests failed. Please check the errors above.")
         print("\nTroubleshooting:")
         print("  1. Ensure all requirements are installed: pip install -r requirements.txt")
-        print("  2. Check Python version: python3 --version (need 3.8+)")
+        print("  2. Check Python version: python3 --version (need 3.9+)")
         print("  3. Install system dependencies (see INSTALL.md)")
         print("  4. For Docker errors, start Docker: sudo systemctl start docker")
         return 1